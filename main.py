@@ -1,8 +1,8 @@
+import asyncio
 import os
-import uuid
 import random
-import time
 from datetime import datetime, timedelta
+from typing import Dict, List, Optional
 from dotenv import load_dotenv
 from loguru import logger
 
@@ -16,55 +16,99 @@ from src.conversation_models import (
     TurnSummary,
     ConversationSummary,
     UserMetadata,
+    Scenario,
+    UserQuery,
 )
 from src.toolsets import (
     read_tools_registry_from_yaml_file,
 )
 from src.content_generator import ContentGenerator
+from src.llm_cache import LLMCache
 
 
-def generate_conversation(
-    generator: ContentGenerator, topic: str, persona: str, turns: int
+def _id_batch(prefix: str, n: int) -> List[str]:
+    """Draws ``n`` random 128-bit ids with a single urandom call."""
+    raw = os.urandom(16 * n)
+    return [f"{prefix}_{raw[i * 16 : (i + 1) * 16].hex()}" for i in range(n)]
+
+
+# Roles are a closed set, so their labels are looked up instead of capitalized
+_ROLE_LABEL = {"user": "User", "assistant": "Assistant"}
+
+
+def _format_history_append(prev: str, new_items: List[Dict[str, str]]) -> str:
+    """Extends an already formatted history with ``{"role", "text"}`` items."""
+    lines = "\n".join(
+        f"{_ROLE_LABEL[item['role']]}: {item['text']}" for item in new_items
+    )
+    return f"{prev}\n{lines}" if prev else lines
+
+
+async def generate_conversation(
+    generator: ContentGenerator,
+    topic: str,
+    persona: str,
+    turns: int,
+    tool_definitions: Dict[str, str],
+    tool_descriptions: str,
+    initial_query: Optional[UserQuery] = None,
 ) -> Conversation:
-    conv_id = f"conv_{uuid.uuid4()}"
+    conv_id = _id_batch("conv", 1)[0]
+    user_msg_ids = _id_batch("user_msg", turns)
+    asst_msg_ids = _id_batch("asst_msg", turns)
+    # Simulated inference latency for every turn, drawn in one call
+    inference_latencies = random.choices(range(500, 1501), k=turns)
     start_time = datetime.now()
     all_turns = []
     total_latency = 0
+    completed_turns = 0
     last_message_id = None
-    conversation_history = []
+    assistant_text = None
+    # Running history string, extended per message instead of re-joined per turn
+    formatted_history = ""
     logger.info(
         "\n" + "=" * 50 + f"\nGenerating new conversation on '{topic}'...\n" + "=" * 50
     )
 
-    tools_registry, _ = read_tools_registry_from_yaml_file(
-        os.path.join("src", "tools_registry", "durian_cultivation.yaml")
-    )
-
+    # Every model below is built from trusted, already-typed values, so
+    # model_construct is used to skip pydantic validation
     for i in range(turns):
         turn_start_time = start_time + timedelta(minutes=i * 2)
         logger.info(f"Turn {i + 1}: Generating user query...")
 
-        tool_descriptions = {
-            tool_name: tool_config["description"]
-            for tool_name, tool_config in tools_registry.items()
-        }
-
-        user_responses = generator.generate_user_query(
-            conversation_history, topic, persona, tool_descriptions
-        )
+        if i == 0 and initial_query:
+            # Opening queries are pre-generated for all scenarios in one request
+            user_responses = initial_query
+        else:
+            user_responses = await generator.generate_user_query(
+                formatted_history,
+                topic,
+                persona,
+                tool_descriptions,
+                last_message=assistant_text,
+            )
+        if user_responses is None:
+            # Generation errors are logged by the generator; keep the turns
+            # produced so far instead of failing the whole conversation
+            logger.warning(
+                f"Turn {i + 1}: No user query generated, ending conversation early."
+            )
+            break
 
         user_query = user_responses.user_message
         suggest_actions = user_responses.suggest_actions
         suggest_tools = user_responses.suggest_tools
 
-        conversation_history.append({"role": "user", "text": user_query})
-        user_msg_id = f"user_msg_{uuid.uuid4()}"
+        formatted_history = _format_history_append(
+            formatted_history, [{"role": "user", "text": user_query}]
+        )
+        user_msg_id = user_msg_ids[i]
         all_turns.append(
-            Turn(
+            Turn.model_construct(
                 turn_id=(i * 2) + 1,
                 initiator_role="user",
                 started_at=turn_start_time,
-                user_message=UserMessage(
+                user_message=UserMessage.model_construct(
                     message_id=user_msg_id,
                     parent_id=last_message_id,
                     text=user_query,
@@ -74,22 +118,35 @@ def generate_conversation(
         )
         last_message_id = user_msg_id
 
-        # Time break
-        time.sleep(0.5)
-
         logger.info(f"Turn {i + 1}: Generating assistant response...")
-        if suggest_tools:
-            tool_calls = []
-            for tool in suggest_tools:
-                result = generator.generate_mock_tool_call(
-                    conversation_history, tool, tools_registry
-                )
-                if result:  # This check filters out the None values
-                    tool_calls.append(result)
+        # Drop tool names the registry doesn't know before dispatching mocks
+        known_tools = []
+        for tool in suggest_tools or ():
+            if tool in tool_definitions:
+                known_tools.append(tool)
+            else:
+                logger.warning(f"Not supported tool name: {tool}")
 
-            tool_outputs = [tc.output_content for tc in tool_calls if tc.success]
-        else:
-            tool_calls = []
+        # Mock tool calls within a turn are independent of each other
+        results = await asyncio.gather(
+            *[
+                generator.generate_mock_tool_call(
+                    formatted_history, tool, tool_definitions
+                )
+                for tool in known_tools
+            ]
+        )
+        tool_calls = []
+        tool_outputs = []
+        tool_latency = 0
+        for tool_call in results:
+            if not tool_call:
+                continue
+            tool_calls.append(tool_call)
+            tool_latency += tool_call.latency_ms
+            if tool_call.success:
+                tool_outputs.append(tool_call.output_content)
+        if not tool_outputs:
             tool_outputs = ["Not need"]
 
         (
@@ -97,19 +154,21 @@ def generate_conversation(
             prompt_token_count,
             completion_token_count,
             total_token_count,
-        ) = generator.generate_assistant_response(
-            conversation_history, persona, tool_outputs, suggest_actions
+        ) = await generator.generate_assistant_response(
+            formatted_history, tool_outputs, suggest_actions, last_message=user_query
         )
-        conversation_history.append({"role": "assistant", "text": assistant_text})
-        asst_msg_id = f"asst_msg_{uuid.uuid4()}"
-        latency = sum(tc.latency_ms for tc in tool_calls) + random.randint(500, 1500)
+        formatted_history = _format_history_append(
+            formatted_history, [{"role": "assistant", "text": assistant_text}]
+        )
+        asst_msg_id = asst_msg_ids[i]
+        latency = tool_latency + inference_latencies[i]
         total_latency += latency
         all_turns.append(
-            Turn(
+            Turn.model_construct(
                 turn_id=(i * 2) + 2,
                 initiator_role="assistant",
                 started_at=turn_start_time,
-                assistant_response=AssistantResponse(
+                assistant_response=AssistantResponse.model_construct(
                     message_id=asst_msg_id,
                     parent_id=last_message_id,
                     text=assistant_text,
@@ -117,8 +176,10 @@ def generate_conversation(
                     assistant_success=True,
                     function_call_success=True,
                     final_output_success=True,
-                    latency=LatencyStats(total_ms=latency, inference_ms=latency - 200),
-                    token_usage=TokenUsage(
+                    latency=LatencyStats.model_construct(
+                        total_ms=latency, inference_ms=latency - 200
+                    ),
+                    token_usage=TokenUsage.model_construct(
                         prompt_tokens=prompt_token_count,
                         completion_tokens=completion_token_count,
                         total_tokens=total_token_count,
@@ -126,24 +187,141 @@ def generate_conversation(
                     generated_at=turn_start_time + timedelta(seconds=5),
                     received_at=turn_start_time + timedelta(seconds=1),
                 ),
-                summary=TurnSummary(intent=f"intent_{topic}", tools_used=suggest_tools),
+                summary=TurnSummary.model_construct(
+                    intent=f"intent_{topic}", tools_used=suggest_tools
+                ),
             )
         )
         last_message_id = asst_msg_id
+        completed_turns += 1
 
-    return Conversation(
+    average_latency = int(total_latency / completed_turns) if completed_turns else 0
+    return Conversation.model_construct(
         id=conv_id,
         language="en",
-        status="completed",
+        status="completed" if completed_turns == turns else "failed",
         turns=all_turns,
-        summary=ConversationSummary(
+        summary=ConversationSummary.model_construct(
             total_turns=len(all_turns),
-            average_processing_time_ms=int(total_latency / turns) if turns > 0 else 0,
-            average_latency_ms=int(total_latency / turns) if turns > 0 else 0,
+            average_processing_time_ms=average_latency,
+            average_latency_ms=average_latency,
         ),
         tags=[topic, persona],
-        user_metadata=UserMetadata(user_id=f"user_{random.randint(1000, 9999)}"),
+        user_metadata=UserMetadata.model_construct(
+            user_id=f"user_{random.randint(1000, 9999)}"
+        ),
+    )
+
+
+def save_conversation(filename: str, conversation: Conversation) -> None:
+    with open(filename, "w", encoding="utf-8") as f:
+        f.write(conversation.model_dump_json(exclude_none=True))
+
+
+async def generate_and_save_conversation(
+    generator: ContentGenerator,
+    scenario: Scenario,
+    turns: int,
+    tool_definitions: Dict[str, str],
+    tool_descriptions: str,
+    initial_query: Optional[UserQuery],
+    filename: str,
+) -> None:
+    generated_conv = await generate_conversation(
+        generator,
+        scenario.situation,
+        scenario.user_persona,
+        turns,
+        tool_definitions,
+        tool_descriptions,
+        initial_query,
     )
+    # Keep the event loop free for in-flight API calls while writing to disk
+    await asyncio.to_thread(save_conversation, filename, generated_conv)
+
+    logger.info(f"\n✅ Conversation successfully generated and saved to '{filename}'")
+
+
+async def run(
+    generator: ContentGenerator,
+    main_topic: str,
+    num_conversations: int,
+    num_turns: int,
+    save_path: str,
+) -> None:
+    try:
+        # Scanned once per run; new files are numbered from this offset by index
+        # rather than re-listing the directory after every write
+        with os.scandir(save_path) as entries:
+            all_files = sum(1 for entry in entries if entry.name.endswith(".json"))
+
+        # Parsed once per run and shared by every conversation
+        tools_registry, _ = read_tools_registry_from_yaml_file(
+            os.path.join("src", "tools_registry", "durian_cultivation.yaml")
+        )
+
+        # Generate scenarios first
+        logger.info(
+            f"🎯 Generating {num_conversations} scenarios for '{main_topic}'..."
+        )
+        scenarios = await generator.generate_scenarios(main_topic, num_conversations)
+        if len(scenarios) == 0:
+            logger.error(f"Total scenario generated: {len(scenarios)}")
+            return
+
+        tool_descriptions = generator.format_tool_descriptions(tools_registry)
+        tool_definitions = generator.format_tool_definitions(tools_registry)
+        initial_queries = await generator.generate_initial_user_queries(
+            scenarios, tool_descriptions
+        )
+        if len(initial_queries) != len(scenarios):
+            # Queries carry no scenario index, so a short or long reply can't be
+            # matched to its scenarios; regenerate every opening query instead
+            logger.warning(
+                f"Got {len(initial_queries)} initial queries for {len(scenarios)} scenarios, "
+                "generating them individually."
+            )
+            initial_queries = await generator.generate_many_user_queries(
+                [
+                    ("", scenario.situation, scenario.user_persona)
+                    for scenario in scenarios
+                ],
+                tool_descriptions,
+            )
+
+        # Conversations are independent of each other, so run them concurrently;
+        # the generator bounds the number of in-flight API requests. Failures are
+        # collected rather than raised so one conversation can't cancel the rest.
+        filenames = [
+            os.path.join(save_path, f"conversation_{all_files + i + 1}.json")
+            for i in range(len(scenarios))
+        ]
+        results = await asyncio.gather(
+            *[
+                generate_and_save_conversation(
+                    generator,
+                    scenario,
+                    num_turns,
+                    tool_definitions,
+                    tool_descriptions,
+                    initial_queries[i] if i < len(initial_queries) else None,
+                    filenames[i],
+                )
+                for i, scenario in enumerate(scenarios)
+            ],
+            return_exceptions=True,
+        )
+        for filename, result in zip(filenames, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    f"❌ Failed to generate conversation '{filename}': {result!r}"
+                )
+
+        logger.info("\n🎉 All conversations generated!")
+    finally:
+        # The generator's pooled HTTP connections must be closed while the
+        # event loop is still running
+        await generator.aclose()
 
 
 if __name__ == "__main__":
@@ -186,7 +364,23 @@ if __name__ == "__main__":
         logger.info("-" * 60)
 
         # Content Generator
-        content_generator = ContentGenerator(api_key, "Gemini")
+        cache_path = os.getenv("LLM_CACHE_PATH")
+        semantic_cache_path = os.getenv("SEMANTIC_CACHE_PATH")
+        if semantic_cache_path:
+            from src.semantic_cache import SemanticCache
+
+            semantic_cache = SemanticCache(index_path=semantic_cache_path)
+        else:
+            semantic_cache = None
+        cache = LLMCache(cache_path) if cache_path else None
+        content_generator = ContentGenerator(
+            api_key,
+            "Gemini",
+            int(os.getenv("GEMINI_CONCURRENCY", "8")),
+            cache=cache,
+            semantic_cache=semantic_cache,
+            mode=os.getenv("GEMINI_MODE", "online"),
+        )
 
         # Datetime
         today_datetime = datetime.today()
@@ -200,35 +394,17 @@ if __name__ == "__main__":
             )
             os.mkdir(save_path)
 
-        all_files = len(
-            [file for file in os.listdir(save_path) if file.endswith(".json")]
-        )
-
-        # Generate scenarios first
-        logger.info(
-            f"🎯 Generating {num_conversations} scenarios for '{main_topic}'..."
+        asyncio.run(
+            run(
+                content_generator,
+                main_topic,
+                num_conversations,
+                num_turns,
+                save_path,
+            )
         )
-        scenarios = content_generator.generate_scenarios(main_topic, num_conversations)
-        if len(scenarios) == 0:
-            logger.error(f"Total scenario generated: {len(scenarios)}")
-        else:
-            for i, scenario in enumerate(scenarios):
-                generated_conv = generate_conversation(
-                    content_generator,
-                    scenario.situation,
-                    scenario.user_persona,
-                    num_turns,
-                )
-                filename = os.path.join(
-                    save_path,
-                    f"conversation_{all_files + i + 1}.json",
-                )
-
-                with open(filename, "w", encoding="utf-8") as f:
-                    f.write(generated_conv.model_dump_json(indent=2))
-
-                logger.info(
-                    f"\n✅ Conversation {all_files + i + 1} successfully generated and saved to '{filename}'"
-                )
 
-            logger.info("\n🎉 All conversations generated!")
+        if cache:
+            cache.close()
+        if semantic_cache:
+            semantic_cache.save()
@@ -0,0 +1,106 @@
+import asyncio
+from typing import List, Type
+from loguru import logger
+from pydantic import BaseModel
+from pydantic_ai.settings import ModelSettings
+
+_FINISHED_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_PARTIALLY_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
+
+class BatchRunner:
+    """Runs structured-output prompts as a single Gemini Batch API job.
+
+    Batch jobs are billed at a discount and don't count against the online
+    rate limits, but may take minutes to complete, so they only suit requests
+    nothing is waiting on interactively.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model_name: str,
+        poll_interval: float = 5.0,
+        max_poll_interval: float = 60.0,
+    ):
+        from google import genai
+
+        self._client = genai.Client(api_key=api_key)
+        self.model_name = model_name
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+
+    async def submit_batch(
+        self,
+        prompts: List[str],
+        basemodel: Type[BaseModel],
+        settings: ModelSettings,
+        system_instruction: str | None = None,
+    ) -> List[BaseModel | None]:
+        """Returns one parsed output per prompt, ``None`` where a request failed."""
+        config = {
+            "response_mime_type": "application/json",
+            "response_schema": basemodel,
+            "temperature": settings.get("temperature"),
+            "top_p": settings.get("top_p"),
+        }
+        if system_instruction:
+            config["system_instruction"] = system_instruction
+        requests = [
+            {
+                "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                "config": config,
+            }
+            for prompt in prompts
+        ]
+
+        try:
+            job = await self._client.aio.batches.create(
+                model=self.model_name, src=requests
+            )
+            logger.info(f"Submitted batch job {job.name} with {len(requests)} requests")
+
+            # Poll with exponential backoff until the job reaches a final state
+            delay = self.poll_interval
+            while job.state.name not in _FINISHED_STATES:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_poll_interval)
+                job = await self._client.aio.batches.get(name=job.name)
+        except Exception as e:
+            logger.error(f"Error calling Gemini Batch API: {e}")
+            return [None] * len(prompts)
+
+        if job.state.name not in (
+            "JOB_STATE_SUCCEEDED",
+            "JOB_STATE_PARTIALLY_SUCCEEDED",
+        ):
+            logger.error(f"Batch job {job.name} finished as {job.state.name}")
+            return [None] * len(prompts)
+
+        # Responses are matched to prompts by position, so anything but one
+        # response per prompt can't be attributed safely
+        inlined_responses = (job.dest.inlined_responses if job.dest else None) or []
+        if len(inlined_responses) != len(prompts):
+            logger.error(
+                f"Batch job {job.name} returned {len(inlined_responses)} responses "
+                f"for {len(prompts)} requests"
+            )
+            return [None] * len(prompts)
+
+        results = []
+        for inlined in inlined_responses:
+            if inlined.error or not inlined.response or not inlined.response.text:
+                logger.error(f"Batch request failed: {inlined.error}")
+                results.append(None)
+                continue
+            try:
+                results.append(basemodel.model_validate_json(inlined.response.text))
+            except ValueError as e:
+                logger.error(f"Invalid batch response: {e}")
+                results.append(None)
+        return results
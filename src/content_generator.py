@@ -1,173 +1,114 @@
+import asyncio
+import hashlib
 import json
-from typing import List, Dict, Tuple, Literal
+import time
+from string import Template
+from typing import Any, Callable, List, Dict, Tuple, Literal
+import httpx
 from loguru import logger
-from pydantic import BaseModel
-from pydantic_ai import Agent as PydanticAgent
+from pydantic import BaseModel, TypeAdapter
+from pydantic_ai import Agent as PydanticAgent, RunContext
 from pydantic_ai.settings import ModelSettings
+from src.batch_runner import BatchRunner
+from src.llm_cache import LLMCache
+from src.semantic_cache import SemanticCache
 from src.conversation_models import (
+    Scenario,
     Scenarios,
     UserQuery,
+    UserQueries,
     ToolCallIO,
 )
 
+_GEMINI_MODEL_NAME = "gemini-2.0-flash"
 
-class ContentGenerator:
-    """Generates conversational content using the Gemini API with history."""
+# Shape of a cached ``_generate_content`` result: (text, prompt, completion, total)
+_CONTENT_RESULT = TypeAdapter(Tuple[str, int, int, int])
 
-    def __init__(self, api_key: str, provider: str = "Gemini"):
-        if provider == "Gemini":
-            self.client = self._initialize_gemini_service(api_key=api_key)
-        else:
-            raise ValueError(f"Currently not supported provider: {provider}")
+# Sampling settings are shared by every call rather than rebuilt per request
+_CONTENT_SETTINGS = ModelSettings(temperature=0.8, top_p=0.95)
+_STRUCTURED_SETTINGS = ModelSettings(temperature=0.9, top_p=0.95)
+# User queries need some variety, but less than scenario brainstorming
+_USER_QUERY_SETTINGS = ModelSettings(temperature=0.7, top_p=0.95)
+# Mocked tool outputs should be deterministic so they are reproducible and
+# the exact-match cache can serve repeated calls
+_MOCK_TOOL_SETTINGS = ModelSettings(temperature=0.0, top_p=1.0)
 
-    def _initialize_gemini_service(self, api_key: str) -> PydanticAgent:
-        from pydantic_ai.models.gemini import GeminiModel
-        from pydantic_ai.providers.google_gla import GoogleGLAProvider
+# Static instructions live in the role agents' system prompts so every call of
+# a role shares a byte-identical prefix that the provider can cache; the
+# per-call templates below only carry what changes between requests.
+_USER_SYSTEM_PROMPT = """\
+--- INSTRUCTIONS ---
+You are simulating a user talking to an AI assistant.
+Do not add any preamble or explanation. Just simulate a user interacting with agentic chatbot.
+Keep the language practical, simple terms and accessible.
+Based on the user message, inquiries, suggest the approriate actions for the assistsant.
+Based on tool's description, suggest tools that best support the inquiry by list down the tool name or just leave None if not needed.
+--- END INSTRUCTIONS ---
+"""
 
-        model = GeminiModel(
-            model_name="gemini-2.0-flash", provider=GoogleGLAProvider(api_key=api_key)
-        )
-        return PydanticAgent(model=model)
 
-    def _generate_content(self, prompt: str) -> Tuple[str, int, int, int]:
-        try:
-            response = self.client.run_sync(
-                user_prompt=prompt,
-                output_type=str,
-                model_settings=ModelSettings(temperature=0.8, top_p=0.95),
-            )
+def _render_available_tools(list_tools_name: str) -> str:
+    return (
+        "--- AVAILABLE TOOLS ---\n"
+        "These are the list current available tool\n"
+        f"{list_tools_name}\n"
+        "--- END AVAILABLE TOOLS ---\n"
+    )
 
-            # Retrieve token usages
-            token_usage = response.usage()
-            prompt_token_count = token_usage.request_tokens
-            completion_token_count = token_usage.response_tokens
-            total_token_count = token_usage.total_tokens
 
-            # Retrieve response text
-            responses = response.output
+def _available_tools_prompt(ctx: RunContext[str]) -> str:
+    """Renders the tool list passed as run deps; it is fixed for a whole run."""
+    return _render_available_tools(ctx.deps)
 
-            return (
-                responses,
-                prompt_token_count,
-                completion_token_count,
-                total_token_count,
-            )
 
-        except Exception as e:
-            logger.error(f"Error calling Gemini API: {e}")
-            return f"// Error generating content: {e} //", 0, 0, 0
+# Prompt templates are parsed once at import time; only the per-call slots are
+# substituted.
+_USER_INITIAL_TMPL = Template("""\
+Your persona: '${persona}'.
+The conversation topic: '${topic}'.
+Language: ${language}
 
-    def _generate_structured_content(
-        self, prompt: str, basemodel: BaseModel
-    ) -> BaseModel | None:
-        try:
-            response = self.client.run_sync(
-                user_prompt=prompt,
-                output_type=basemodel,
-                model_settings=ModelSettings(temperature=0.9, top_p=0.95),
-            )
-            return response.output
+Generate a single, short, initial question a user would ask about this topic.
+""")
 
-        except Exception as e:
-            logger.error(f"Error calling Gemini API: {e}")
-            return None
+_USER_INITIAL_BATCH_TMPL = Template("""\
+You are simulating ${num_scenarios} different users, each talking to an AI assistant.
+Each numbered scenario below describes one user's persona and conversation topic.
+Language: ${language}
 
-    def _format_history(self, history: List[Dict[str, str]]) -> str:
-        """Formats the history list into a readable string for the prompt."""
-        if not history:
-            return "This is the beginning of the conversation."
-        return "\n".join(
-            [f"{item['role'].capitalize()}: {item['text']}" for item in history]
-        )
-
-    def generate_user_query(
-        self,
-        history: List[Dict[str, str]],
-        topic: str,
-        persona: str,
-        list_tools_name: List[str],
-        language: Literal["English", "ภาษาไทย"] = "English",
-    ) -> BaseModel:
-        formatted_history = self._format_history(history)
-        if not history:  # Initial query
-            prompt = f"""
---- AVAILABLE TOOLS ---
-These are the list current available tool
-{json.dumps(list_tools_name, indent=4, ensure_ascii=False)}
---- END AVAILABLE TOOLS ---
+For each scenario, in the same order, generate a single, short, initial question that user would ask about their topic.
+Return exactly ${num_scenarios} queries, one per scenario.
 
---- INSTRUCTIONS ---
-You are simulating a user talking to an AI assistant.
-Your persona: '{persona}'.
-The conversation topic: '{topic}'.
-Language: {language}
+--- SCENARIOS ---
+${scenarios}
+--- END SCENARIOS ---
+""")
 
-Generate a single, short, initial question a user would ask about this topic.
-Do not add any preamble or explanation. Just simulate a user interacting with agentic chatbot.
-Keep the language practical, simple terms and accessible.
-Based on the user message, inquiries, suggest the approriate actions for the assistsant.
-Suggest tools that best support the inquiry by list down the tool name or just leave None if not needed.
---- END INSTRUCTIONS ---
-"""
-        else:  # Follow-up query
-            prompt = f"""
---- AVAILABLE TOOLS ---
-These are the list current available tool
-{json.dumps(list_tools_name, indent=4, ensure_ascii=False)}
---- END AVAILABLE TOOLS ---
+# History is append-only, so keep it last to preserve a stable prefix
+_USER_FOLLOWUP_TMPL = Template("""\
+You are in an ongoing conversation with the AI assistant.
+Your persona: '${persona}'.
+Language: ${language}
 
---- INSTRUCTIONS ---
-You are simulating a user in an ongoing conversation with an AI assistant.
-Your persona: '{persona}'.
-Language: {language}
+Based on the assistant's last response and the entire conversation context, generate a single, short, relevant follow-up question.
 
 Here is the conversation history so far:
 --- HISTORY ---
-{formatted_history}
+${formatted_history}
 --- END HISTORY ---
+""")
 
-Based on the assistant's last response and the entire conversation context, generate a single, short, relevant follow-up question.
-Do not add any preamble or explanation. Just simulate a user interacting with agentic chatbot.
-Keep the language practical, simple terms and accessible.
-Based on the user message, inquiries, suggest the approriate actions for the assistsant.
-Based on tool's description, suggest tools that best support the inquiry by list down the tool name or just leave None if not needed.
---- END INSTRUCTIONS ---
-"""
-        return self._generate_structured_content(prompt.strip(), UserQuery)
-
-    def generate_assistant_response(
-        self,
-        history: List[Dict[str, str]],
-        tool_outputs: List[str],
-        suggest_actions: List[str],
-        language: Literal["English", "ภาษาไทย"] = "English",
-    ) -> Tuple[str, int, int, int]:
-        formatted_history = self._format_history(history)
-
-        prompt = f"""
+_ASSISTANT_SYSTEM_PROMPT = """\
 You are a friendly, laid-back, and knowledgeable agricultural expert. Your goal is to make complex topics easy and fun to understand.
 Your tone is formal, show respecting, encouraging, and approachable.
 
-Here is the conversation history so far. The last message is the user's current query.
---- HISTORY ---
-{formatted_history}
---- END HISTORY ---
-
---- SUGGEST ACTIONS ---
-{suggest_actions}
---- END SUGGEST ACTIONS ---
-
-You have just used your internal tools to gather information for your response and received the following data:
---- TOOL OUTPUTS ---
-{tool_outputs}
---- END TOOL OUTPUTS ---
-
 --- COMMUNICATION STYLE ---
 - **Use Simple, Practical Language:** Translate complex scientific or technical terms into simple, common language.
 - **Be Direct:** Skip introductory phrases like "I can help with that." Jump straight to the core of the answer or question. Don't repeat the question.
 - **Explain Acronyms:** If the user uses an acronym (e.g., "NPK"), spell it out in your response (e.g., "Nitrogen, Phosphorus, and Potassium").
 - **Be Factual but Friendly:** Provide factual information, but frame it with your encouraging and informal persona. Frame tips and suggestions as exciting "hacks" or inside knowledge (e.g., "Wanna know a lil' hack to deal with it? 😉?").
-- **Language:** {language}
+- **Language:** Reply in the language requested with each message.
 --- END COMMUNICATION STYLE ---
 
 --- RESPOND STRATEGY ---
@@ -201,11 +142,27 @@ Your response strategy depends on the clarity of the user's message:
     - **Output:** "You can process durian into higher-value products like durian paste, frozen durian, durian chips, durian candies, or durian ice cream. These are straight up money printers compared to selling fresh fruit. No cap, your profit margins are about to be bussin! Which one's hitting different for you?"
 --- END EXAMPLES ---
 """
-        return self._generate_content(prompt.strip())
 
-    def generate_scenarios(self, topic: str, num_scenarios: int) -> List[BaseModel]:
-        prompt = f"""
-Generate {num_scenarios} diverse, realistic scenarios related to '{topic}'.
+_ASSISTANT_TMPL = Template("""\
+Language: ${language}
+
+Here is the conversation history so far. The last message is the user's current query.
+--- HISTORY ---
+${formatted_history}
+--- END HISTORY ---
+
+--- SUGGEST ACTIONS ---
+${suggest_actions}
+--- END SUGGEST ACTIONS ---
+
+You have just used your internal tools to gather information for your response and received the following data:
+--- TOOL OUTPUTS ---
+${tool_outputs}
+--- END TOOL OUTPUTS ---
+""")
+
+_SCENARIOS_TMPL = Template("""\
+Generate ${num_scenarios} diverse, realistic scenarios related to '${topic}'.
 Each scenario should represent a different use case, problem, or situation within this domain.
 
 Format your response as a numbered list with:
@@ -219,10 +176,592 @@ Example format:
 3. **Greeting and General conversation** - This encompasses initial greetings, casual conversation, and exploratory interactions where users seek to assess the AI service's capabilities.
 4. **Incorporate To Answer** - This covers scenarios where users provide information independently, without integrating it into a structured query or prompt.
 
-Make each scenario distinct and realistic for the '{topic}' domain.
-"""
+Make each scenario distinct and realistic for the '${topic}' domain.
+""")
+
+_MOCK_TOOL_CALL_TMPL = Template("""\
+--- HISTORY ---
+${formatted_history}
+--- END HISTORY ---
+
+--- TOOL ---
+Tool name: ${tool_name}
+Tool definition: ${tool_def}
+--- END TOOL ---
+
+Act as a tool, select the approriate params and help me generate the result from the tool based on the input.
+""")
+
 
-        response = self._generate_structured_content(prompt, Scenarios)
+_ROLE_NAMES = {
+    None: "default",
+    _USER_SYSTEM_PROMPT: "user",
+    _ASSISTANT_SYSTEM_PROMPT: "assistant",
+}
+
+
+def _semantic_namespace(
+    output_type: type, system_prompt: str | None, deps: str | None
+) -> str:
+    """Partitions semantic-cache entries by output type, role and run deps."""
+    namespace = f"{output_type.__qualname__}/{_ROLE_NAMES[system_prompt]}"
+    if deps is not None:
+        namespace += "/" + hashlib.sha256(deps.encode("utf-8")).hexdigest()[:12]
+    return namespace
+
+
+class ContentGenerator:
+    """Generates conversational content using the Gemini API with history."""
+
+    def __init__(
+        self,
+        api_key: str,
+        provider: str = "Gemini",
+        max_concurrency: int = 8,
+        cache: LLMCache | None = None,
+        semantic_cache: SemanticCache | None = None,
+        mode: Literal["online", "batch"] = "online",
+    ):
+        self._http_client: httpx.AsyncClient | None = None
+        if provider == "Gemini":
+            model = self._initialize_gemini_service(api_key=api_key)
+        else:
+            raise ValueError(f"Currently not supported provider: {provider}")
+
+        self._model = model
+        # Agents are keyed by (output type, static system prompt) and fixed to
+        # their output type, so pydantic-ai builds each output schema once
+        # instead of on every run
+        self._agents: Dict[Tuple[type, str | None], PydanticAgent] = {}
+        for output_type, system_prompt in (
+            (Scenarios, None),
+            (ToolCallIO, None),
+            (UserQuery, _USER_SYSTEM_PROMPT),
+            (UserQueries, _USER_SYSTEM_PROMPT),
+            (str, _ASSISTANT_SYSTEM_PROMPT),
+        ):
+            self._agent_for(output_type, system_prompt)
+
+        # Caps in-flight API requests across all concurrent callers
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        # Batch mode routes scenario and opening-query generation, which
+        # nothing waits on interactively, through the discounted Batch API
+        if mode == "batch":
+            self._batch_runner = BatchRunner(api_key, _GEMINI_MODEL_NAME)
+        elif mode == "online":
+            self._batch_runner = None
+        else:
+            raise ValueError(f"Currently not supported mode: {mode}")
+
+    def _initialize_gemini_service(self, api_key: str) -> Any:
+        from pydantic_ai.models.gemini import GeminiModel
+        from pydantic_ai.providers.google_gla import GoogleGLAProvider
+
+        # One pooled HTTP/2 client for every call: connections are kept alive
+        # and concurrent requests are multiplexed instead of each paying for a
+        # new TLS handshake
+        self._http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(timeout=600, connect=5),
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+        )
+        return GeminiModel(
+            model_name=_GEMINI_MODEL_NAME,
+            provider=GoogleGLAProvider(api_key=api_key, http_client=self._http_client),
+        )
+
+    async def aclose(self) -> None:
+        """Closes the pooled HTTP client; await it once the generator is done."""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    def _agent_for(
+        self, output_type: type, system_prompt: str | None = None
+    ) -> PydanticAgent:
+        agent = self._agents.get((output_type, system_prompt))
+        if agent is None:
+            agent = PydanticAgent(
+                model=self._model,
+                output_type=output_type,
+                system_prompt=system_prompt or (),
+                deps_type=str,
+            )
+            if system_prompt == _USER_SYSTEM_PROMPT:
+                agent.system_prompt(_available_tools_prompt)
+            self._agents[(output_type, system_prompt)] = agent
+        return agent
+
+    def _cache_key(
+        self,
+        prompt: str,
+        settings: ModelSettings,
+        output_type: type,
+        system_prompt: str | None = None,
+        deps: str | None = None,
+    ) -> str:
+        return LLMCache.make_key(
+            model=_GEMINI_MODEL_NAME,
+            system_prompt=system_prompt,
+            deps=deps,
+            prompt=prompt,
+            settings=settings,
+            output_type=f"{output_type.__module__}.{output_type.__qualname__}",
+        )
+
+    async def _lookup_caches(
+        self,
+        prompt: str,
+        settings: ModelSettings,
+        output_type: type,
+        semantic_key: str | None,
+        parse: Callable[[str], Any],
+        system_prompt: str | None = None,
+        deps: str | None = None,
+    ) -> Tuple[Any, str | None, Tuple[str, Any] | None]:
+        """Returns ``(cached_value, cache_key, semantic_entry)`` for a request.
+
+        Cached entries are rehydrated with ``parse``; one that no longer parses
+        (corrupt, or written under an older schema) counts as a miss and is
+        overwritten once the fresh response is stored.
+
+        The semantic cache is only consulted when a ``semantic_key`` is given:
+        the per-call part of the prompt with the newest message first, since
+        the embedding model truncates long inputs and a shared prefix (static
+        instructions or an ever-growing history) would make every request look
+        alike. Entries are namespaced by output type, role and deps, so a hit
+        is always the same kind of response. ``semantic_entry`` is the
+        ``(namespace, embedding)`` to store the fresh response under.
+        """
+        cache_key = None
+        if self.cache:
+            cache_key = self._cache_key(
+                prompt, settings, output_type, system_prompt, deps
+            )
+            cached = self._parse_cached(
+                await asyncio.to_thread(self.cache.get, cache_key), parse
+            )
+            if cached is not None:
+                return cached, cache_key, None
+
+        semantic_entry = None
+        if self.semantic_cache and semantic_key is not None:
+            namespace = _semantic_namespace(output_type, system_prompt, deps)
+            embedding = await asyncio.to_thread(self.semantic_cache.embed, semantic_key)
+            semantic_entry = (namespace, embedding)
+            cached = self._parse_cached(
+                self.semantic_cache.lookup(namespace, embedding), parse
+            )
+            if cached is not None:
+                return cached, cache_key, semantic_entry
+
+        return None, cache_key, semantic_entry
+
+    def _parse_cached(self, cached: str | None, parse: Callable[[str], Any]) -> Any:
+        if cached is None:
+            return None
+        try:
+            return parse(cached)
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable cache entry: {e}")
+            return None
+
+    async def _store_caches(
+        self,
+        cache_key: str | None,
+        semantic_entry: Tuple[str, Any] | None,
+        value: str,
+    ) -> None:
+        if cache_key:
+            # SQLite writes commit to disk, so keep them off the event loop
+            await asyncio.to_thread(self.cache.set, cache_key, value)
+        if semantic_entry is not None:
+            self.semantic_cache.add(*semantic_entry, value)
+
+    async def _generate_content(
+        self,
+        prompt: str,
+        semantic_key: str | None = None,
+        system_prompt: str | None = None,
+    ) -> Tuple[str, int, int, int]:
+        cached, cache_key, semantic_entry = await self._lookup_caches(
+            prompt,
+            _CONTENT_SETTINGS,
+            str,
+            semantic_key,
+            _CONTENT_RESULT.validate_json,
+            system_prompt,
+        )
+        if cached is not None:
+            return cached
+
+        try:
+            # Stream the response so the first tokens are seen as soon as they
+            # are generated instead of after the whole completion
+            chunks = []
+            first_token_s = None
+            async with self._semaphore:
+                start = time.perf_counter()
+                async with self._agent_for(str, system_prompt).run_stream(
+                    user_prompt=prompt,
+                    model_settings=_CONTENT_SETTINGS,
+                ) as response:
+                    async for delta in response.stream_text(
+                        delta=True, debounce_by=None
+                    ):
+                        if first_token_s is None:
+                            first_token_s = time.perf_counter() - start
+                        chunks.append(delta)
+
+                    # Retrieve token usages, complete once the stream is exhausted
+                    token_usage = response.usage()
+
+            prompt_token_count = token_usage.request_tokens
+            completion_token_count = token_usage.response_tokens
+            total_token_count = token_usage.total_tokens
+            cached_token_count = (token_usage.details or {}).get(
+                "cached_content_tokens", 0
+            )
+            logger.debug(
+                f"Prompt tokens: {prompt_token_count} (cached: {cached_token_count}), "
+                f"first token after {first_token_s or 0:.2f}s, "
+                f"completed after {time.perf_counter() - start:.2f}s"
+            )
+
+            # Retrieve response text
+            responses = "".join(chunks)
+
+            result = (
+                responses,
+                prompt_token_count,
+                completion_token_count,
+                total_token_count,
+            )
+            await self._store_caches(
+                cache_key, semantic_entry, json.dumps(result, ensure_ascii=False)
+            )
+            return result
+
+        except Exception as e:
+            logger.error(f"Error calling Gemini API: {e}")
+            return f"// Error generating content: {e} //", 0, 0, 0
+
+    async def _generate_structured_content(
+        self,
+        prompt: str,
+        basemodel: BaseModel,
+        semantic_key: str | None = None,
+        system_prompt: str | None = None,
+        deps: str | None = None,
+        settings: ModelSettings = _STRUCTURED_SETTINGS,
+    ) -> BaseModel | None:
+        cached, cache_key, semantic_entry = await self._lookup_caches(
+            prompt,
+            settings,
+            basemodel,
+            semantic_key,
+            basemodel.model_validate_json,
+            system_prompt,
+            deps,
+        )
+        if cached is not None:
+            return cached
+
+        try:
+            async with self._semaphore:
+                response = await self._agent_for(basemodel, system_prompt).run(
+                    user_prompt=prompt,
+                    model_settings=settings,
+                    deps=deps,
+                )
+            await self._store_caches(
+                cache_key, semantic_entry, response.output.model_dump_json()
+            )
+            return response.output
+
+        except Exception as e:
+            logger.error(f"Error calling Gemini API: {e}")
+            return None
+
+    async def _generate_structured_batch(
+        self,
+        prompts: List[str],
+        basemodel: BaseModel,
+        system_prompt: str | None = None,
+        deps: str | None = None,
+        settings: ModelSettings = _STRUCTURED_SETTINGS,
+        semantic_keys: List[str | None] | None = None,
+    ) -> List[BaseModel | None]:
+        """Runs ``prompts`` as one batch job, or concurrently when online.
+
+        Prompts answered by the exact or semantic cache are served locally; only
+        the misses are submitted, and their responses are stored in both.
+        """
+        semantic_keys = semantic_keys or [None] * len(prompts)
+        if not self._batch_runner:
+            return await asyncio.gather(
+                *[
+                    self._generate_structured_content(
+                        prompt,
+                        basemodel,
+                        semantic_key=semantic_key,
+                        system_prompt=system_prompt,
+                        deps=deps,
+                        settings=settings,
+                    )
+                    for prompt, semantic_key in zip(prompts, semantic_keys)
+                ]
+            )
+
+        lookups = await asyncio.gather(
+            *[
+                self._lookup_caches(
+                    prompt,
+                    settings,
+                    basemodel,
+                    semantic_key,
+                    basemodel.model_validate_json,
+                    system_prompt,
+                    deps,
+                )
+                for prompt, semantic_key in zip(prompts, semantic_keys)
+            ]
+        )
+        results: List[BaseModel | None] = [cached for cached, _, _ in lookups]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+
+        # The deps-driven tool list is part of the user agent's system prompt
+        system_instruction = "\n".join(
+            part
+            for part in (
+                system_prompt,
+                _render_available_tools(deps) if deps is not None else None,
+            )
+            if part
+        )
+        outputs = await self._batch_runner.submit_batch(
+            [prompts[i] for i in pending],
+            basemodel,
+            settings,
+            system_instruction or None,
+        )
+        if len(outputs) != len(pending):
+            logger.error(
+                f"Got {len(outputs)} batch outputs for {len(pending)} prompts, "
+                "discarding them"
+            )
+            return results
+
+        for i, output in zip(pending, outputs):
+            if output is None:
+                continue
+            results[i] = output
+            _, cache_key, semantic_entry = lookups[i]
+            await self._store_caches(
+                cache_key, semantic_entry, output.model_dump_json()
+            )
+        return results
+
+    def _format_history(self, history: str) -> str:
+        """Returns the pre-formatted history, or a placeholder when it is empty."""
+        if not history:
+            return "This is the beginning of the conversation."
+        return history
+
+    def format_tool_descriptions(self, tool_registry: Dict) -> str:
+        """Renders the tool descriptions embedded in user-query prompts.
+
+        The registry does not change during a run, so callers build this once
+        and pass it to every user-query call.
+        """
+        tool_descriptions = {
+            tool_name: tool_config["description"]
+            for tool_name, tool_config in tool_registry.items()
+        }
+        return json.dumps(tool_descriptions, indent=4, ensure_ascii=False)
+
+    def format_tool_definitions(self, tool_registry: Dict) -> Dict[str, str]:
+        """Serializes each tool definition once for the mock tool-call prompts."""
+        return {
+            tool_name: json.dumps(tool_def, indent=4, ensure_ascii=False)
+            for tool_name, tool_def in tool_registry.items()
+        }
+
+    async def generate_user_query(
+        self,
+        history: str,
+        topic: str,
+        persona: str,
+        list_tools_name: str,
+        language: Literal["English", "ภาษาไทย"] = "English",
+        last_message: str | None = None,
+    ) -> BaseModel:
+        """Simulates the next user message.
+
+        ``last_message`` is the assistant's latest reply; it keys the semantic
+        cache for follow-ups, which is skipped when it isn't given.
+        """
+        prompt = self._user_query_prompt(history, topic, persona, language)
+        return await self._generate_structured_content(
+            prompt,
+            UserQuery,
+            semantic_key=self._user_query_semantic_key(
+                history, topic, persona, last_message
+            ),
+            system_prompt=_USER_SYSTEM_PROMPT,
+            deps=list_tools_name,
+            settings=_USER_QUERY_SETTINGS,
+        )
+
+    def _user_query_semantic_key(
+        self, history: str, topic: str, persona: str, last_message: str | None
+    ) -> str | None:
+        if not history:
+            return f"{persona}\n{topic}"
+        if last_message is not None:
+            return f"{last_message}\n{persona}\n{topic}"
+        return None
+
+    def _user_query_prompt(
+        self, history: str, topic: str, persona: str, language: str
+    ) -> str:
+        if not history:  # Initial query
+            return _USER_INITIAL_TMPL.substitute(
+                persona=persona,
+                topic=topic,
+                language=language,
+            )
+        # Follow-up query
+        return _USER_FOLLOWUP_TMPL.substitute(
+            persona=persona,
+            language=language,
+            formatted_history=self._format_history(history),
+        )
+
+    async def generate_many_user_queries(
+        self,
+        contexts: List[Tuple[str, str, str]],
+        list_tools_name: str,
+        language: Literal["English", "ภาษาไทย"] = "English",
+    ) -> List[UserQuery | None]:
+        """Runs independent ``generate_user_query`` calls concurrently.
+
+        Each context is a ``(history, topic, persona)`` tuple; results keep the
+        order of ``contexts``. In batch mode they are submitted as one job.
+        """
+        if self._batch_runner:
+            return await self._generate_structured_batch(
+                [
+                    self._user_query_prompt(history, topic, persona, language)
+                    for history, topic, persona in contexts
+                ],
+                UserQuery,
+                system_prompt=_USER_SYSTEM_PROMPT,
+                deps=list_tools_name,
+                settings=_USER_QUERY_SETTINGS,
+                semantic_keys=[
+                    self._user_query_semantic_key(history, topic, persona, None)
+                    for history, topic, persona in contexts
+                ],
+            )
+        return await asyncio.gather(
+            *[
+                self.generate_user_query(
+                    history, topic, persona, list_tools_name, language
+                )
+                for history, topic, persona in contexts
+            ]
+        )
+
+    async def generate_initial_user_queries(
+        self,
+        scenarios: List[Scenario],
+        list_tools_name: str,
+        language: Literal["English", "ภาษาไทย"] = "English",
+    ) -> List[UserQuery | None]:
+        """Generates the opening query of every scenario in a single request.
+
+        The result follows the order of ``scenarios``. Its length is not
+        checked here, so callers should only rely on it when the model returned
+        exactly one query per scenario. In batch mode each scenario gets its
+        own request within one job, so the result always matches ``scenarios``
+        and holds ``None`` where a request failed.
+        """
+        if self._batch_runner:
+            return await self.generate_many_user_queries(
+                [
+                    ("", scenario.situation, scenario.user_persona)
+                    for scenario in scenarios
+                ],
+                list_tools_name,
+                language,
+            )
+
+        formatted_scenarios = "\n".join(
+            f"{i + 1}. Persona: '{scenario.user_persona}'. Topic: '{scenario.situation}'."
+            for i, scenario in enumerate(scenarios)
+        )
+        prompt = _USER_INITIAL_BATCH_TMPL.substitute(
+            num_scenarios=len(scenarios),
+            language=language,
+            scenarios=formatted_scenarios,
+        )
+
+        response = await self._generate_structured_content(
+            prompt,
+            UserQueries,
+            system_prompt=_USER_SYSTEM_PROMPT,
+            deps=list_tools_name,
+            settings=_USER_QUERY_SETTINGS,
+        )
+        if not response:
+            return []
+
+        return response.query_list
+
+    async def generate_assistant_response(
+        self,
+        history: str,
+        tool_outputs: List[str],
+        suggest_actions: List[str],
+        language: Literal["English", "ภาษาไทย"] = "English",
+        last_message: str | None = None,
+    ) -> Tuple[str, int, int, int]:
+        """Generates the assistant reply to the last message in ``history``.
+
+        ``last_message`` is the user query being answered; it keys the semantic
+        cache, which is skipped when it isn't given.
+        """
+        formatted_history = self._format_history(history)
+
+        prompt = _ASSISTANT_TMPL.substitute(
+            language=language,
+            formatted_history=formatted_history,
+            suggest_actions=suggest_actions,
+            tool_outputs=tool_outputs,
+        )
+        return await self._generate_content(
+            prompt,
+            semantic_key=(
+                f"{last_message}\n{suggest_actions}\n{tool_outputs}"
+                if last_message is not None
+                else None
+            ),
+            system_prompt=_ASSISTANT_SYSTEM_PROMPT,
+        )
+
+    async def generate_scenarios(
+        self, topic: str, num_scenarios: int
+    ) -> List[BaseModel]:
+        prompt = _SCENARIOS_TMPL.substitute(num_scenarios=num_scenarios, topic=topic)
+
+        response = await self._generate_structured_content(prompt, Scenarios)
+        if not response:
+            return []
         scenario_list = response.scenario_list
 
         if not scenario_list:
@@ -234,27 +773,23 @@ Make each scenario distinct and realistic for the '{topic}' domain.
             else scenario_list
         )
 
-    def generate_mock_tool_call(
-        self, history: List[Dict[str, str]], tool_name: str, tool_registry: Dict
+    async def generate_mock_tool_call(
+        self, history: str, tool_name: str, tool_definitions: Dict[str, str]
     ) -> BaseModel | None:
-        tool_def = tool_registry.get(tool_name, "")
+        """Mocks a tool's output; ``tool_definitions`` comes from ``format_tool_definitions``."""
+        tool_def = tool_definitions.get(tool_name, "")
         if not tool_def:
             logger.warning(f"Not supported tool name: {tool_name}")
             return None
         formatted_history = self._format_history(history)
 
-        prompt = f"""
---- HISTORY ---
-{formatted_history}
---- END HISTORY ---
-
---- TOOL ---
-Tool name: {tool_name}
-Tool definition: {json.dumps(tool_def, indent=4, ensure_ascii=False)}
---- END TOOL ---
-
-Act as a tool, select the approriate params and help me generate the result from the tool based on the input.
-"""
+        prompt = _MOCK_TOOL_CALL_TMPL.substitute(
+            formatted_history=formatted_history,
+            tool_name=tool_name,
+            tool_def=tool_def,
+        )
 
-        responses = self._generate_structured_content(prompt.strip(), ToolCallIO)
+        responses = await self._generate_structured_content(
+            prompt, ToolCallIO, settings=_MOCK_TOOL_SETTINGS
+        )
         return responses
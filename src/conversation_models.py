@@ -1,8 +1,13 @@
-from pydantic import BaseModel, HttpUrl, Field
+from pydantic import BaseModel, HttpUrl, Field, field_serializer
 from typing import Optional, Literal, List, Dict
 from datetime import datetime
 
 
+def _to_epoch(value: datetime) -> int:
+    """Serializes datetimes as UNIX seconds, cheaper than ISO 8601 formatting."""
+    return int(value.timestamp())
+
+
 class UserMetadata(BaseModel):
     user_id: Optional[str] = None
     language: Optional[str] = None
@@ -24,6 +29,8 @@ class UserMessage(BaseModel):
     attachments: Optional[List[Attachment]] = None
     timestamp: datetime
 
+    _serialize_timestamp = field_serializer("timestamp", when_used="json")(_to_epoch)
+
 
 class ErrorDetail(BaseModel):
     code: Optional[str] = None
@@ -80,6 +87,10 @@ class AssistantResponse(BaseModel):
     generated_at: datetime
     received_at: datetime
 
+    _serialize_datetimes = field_serializer(
+        "generated_at", "received_at", when_used="json"
+    )(_to_epoch)
+
 
 class Turn(BaseModel):
     turn_id: int
@@ -89,6 +100,8 @@ class Turn(BaseModel):
     assistant_response: Optional[AssistantResponse] = None
     summary: Optional[TurnSummary] = None
 
+    _serialize_started_at = field_serializer("started_at", when_used="json")(_to_epoch)
+
 
 class ConversationSummary(BaseModel):
     total_turns: int
@@ -104,7 +117,7 @@ class Conversation(BaseModel):
     summary: ConversationSummary
     tags: Optional[List[str]] = []
     user_metadata: Optional[UserMetadata] = None
-    schema_version: str = Field(default="2.0.0")
+    schema_version: str = Field(default="2.1.0")
 
 
 class Scenario(BaseModel):
@@ -123,5 +136,9 @@ class UserQuery(BaseModel):
     suggest_tools: Optional[List[str]] = None
 
 
+class UserQueries(BaseModel):
+    query_list: List[UserQuery]
+
+
 class ToolRequestResults(BaseModel):
     responses: List[ToolCallIO]
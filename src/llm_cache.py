@@ -0,0 +1,61 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+
+class LLMCache:
+    """Exact-match cache for LLM responses, keyed by a hash of the request.
+
+    Backed by SQLite: pass a file path to persist entries across runs, or keep
+    the default ``":memory:"`` for a cache that lives only in this process.
+    Methods may be called from worker threads; a lock serializes them on the
+    shared connection.
+    """
+
+    def __init__(self, path: str = ":memory:", default_ttl: Optional[float] = None):
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(**request: Any) -> str:
+        """Hashes every field that influences the response (model, prompt, settings, ...)."""
+        payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, expires_at = row
+            if expires_at is not None and expires_at < time.time():
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
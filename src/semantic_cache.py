@@ -0,0 +1,89 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+
+class SemanticCache:
+    """Nearest-neighbour cache that reuses responses for near-duplicate requests.
+
+    Requests are embedded with a sentence-transformers model and compared by
+    cosine similarity in a FAISS inner-product index over L2-normalized
+    vectors; a stored response is returned when the best match scores at least
+    ``threshold``. Entries are partitioned by ``namespace`` so a lookup only
+    ever returns responses of the same kind. Needs the optional
+    ``semantic-cache`` dependencies.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        threshold: float = 0.92,
+        index_path: Optional[str] = None,
+    ):
+        try:
+            import faiss
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                "SemanticCache requires the 'semantic-cache' extra: "
+                "uv sync --extra semantic-cache"
+            ) from e
+
+        self._faiss = faiss
+        self._encoder = SentenceTransformer(model_name)
+        self.threshold = threshold
+        self.index_path = index_path
+        self._indexes: Dict[str, Any] = {}
+        self._values: Dict[str, List[str]] = {}
+
+        # The sidecar maps each namespace to its stored responses; every
+        # namespace's vectors live in their own index file. A namespace whose
+        # index file is missing is dropped, since its values can't be matched.
+        if index_path and os.path.exists(f"{index_path}.json"):
+            with open(f"{index_path}.json", "r", encoding="utf-8") as f:
+                values = json.load(f)
+            for namespace, namespace_values in values.items():
+                index_file = self._index_file(namespace)
+                if not os.path.exists(index_file):
+                    continue
+                self._indexes[namespace] = faiss.read_index(index_file)
+                self._values[namespace] = namespace_values
+
+    def _index_file(self, namespace: str) -> str:
+        digest = hashlib.sha256(namespace.encode("utf-8")).hexdigest()[:16]
+        return f"{self.index_path}.{digest}.faiss"
+
+    def embed(self, text: str) -> Any:
+        """Embeds ``text``; CPU-bound, so async callers should run it in a thread."""
+        return self._encoder.encode(
+            [text], normalize_embeddings=True, convert_to_numpy=True
+        ).astype("float32")
+
+    def lookup(self, namespace: str, embedding: Any) -> Optional[str]:
+        index = self._indexes.get(namespace)
+        if index is None or index.ntotal == 0:
+            return None
+        scores, ids = index.search(embedding, 1)
+        if scores[0][0] >= self.threshold:
+            return self._values[namespace][ids[0][0]]
+        return None
+
+    def add(self, namespace: str, embedding: Any, value: str) -> None:
+        index = self._indexes.get(namespace)
+        if index is None:
+            index = self._indexes[namespace] = self._faiss.IndexFlatIP(
+                embedding.shape[1]
+            )
+            self._values[namespace] = []
+        index.add(embedding)
+        self._values[namespace].append(value)
+
+    def save(self) -> None:
+        """Persists every namespace's index next to the shared values sidecar."""
+        if not self.index_path:
+            return
+        for namespace, index in self._indexes.items():
+            self._faiss.write_index(index, self._index_file(namespace))
+        with open(f"{self.index_path}.json", "w", encoding="utf-8") as f:
+            json.dump(self._values, f, ensure_ascii=False)
@@ -1,12 +1,31 @@
+import os
 import yaml
 import random
+from functools import lru_cache
 from typing import Optional, Tuple, Dict
 from src.conversation_models import ToolCallIO
 
+# libyaml's C loader is much faster; fall back to the pure-Python one if
+# PyYAML was built without it
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class _SafeMap(dict):
+    """Fills template placeholders that have no generated value with "N/A"."""
+
+    def __missing__(self, key: str) -> str:
+        return "N/A"
+
 
 def read_tools_registry_from_yaml_file(file_path: str) -> Tuple[Dict, Dict]:
+    # Keyed on the modification time so an edited registry is re-read
+    return _load_tools_registry(file_path, os.path.getmtime(file_path))
+
+
+@lru_cache(maxsize=4)
+def _load_tools_registry(file_path: str, mtime: float) -> Tuple[Dict, Dict]:
     with open(file_path, "r") as file:
-        file_content = yaml.safe_load(file)
+        file_content = yaml.load(file, Loader=_YAML_LOADER)
 
     return (
         file_content.get("TOOLS_REGISTRY"),
@@ -14,41 +33,43 @@ def read_tools_registry_from_yaml_file(file_path: str) -> Tuple[Dict, Dict]:
     )
 
 
-def generate_mock_tool_call(tool_name: str, registry: dict) -> Optional[ToolCallIO]:
+def generate_mock_tool_call(
+    tool_name: str, registry: dict, rng: Optional[random.Random] = None
+) -> Optional[ToolCallIO]:
     if tool_name not in registry:
         return None
 
+    rng = rng or random
     tool_def = registry[tool_name]
     input_params = {}
-    format_args = {}
+    format_args = _SafeMap()
 
     # Generate random-but-valid parameters
     for param_name, param_def in tool_def["params"].items():
         if param_def.get("enum"):
-            value = random.choice(param_def["enum"])
+            value = rng.choice(param_def["enum"])
         elif param_def["type"] == "int":
-            value = (
-                random.randint(2, 10)
-                if "age" in param_name
-                else random.randint(50, 200)
-            )
+            value = rng.randint(2, 10) if "age" in param_name else rng.randint(50, 200)
         else:
             value = "mock_string_value"
-        input_params[param_name] = value
+        # input_params is typed Dict[str, str] and is not validated below
+        input_params[param_name] = str(value)
         format_args[param_name] = value
 
     # Add random values for the output template
-    format_args["price"] = random.randint(150, 220) * 1000
-    format_args["amount"] = random.randint(100, 500)
-    format_args["volume"] = random.randint(50, 200)
-    format_args["chance"] = random.randint(10, 60)
+    format_args["price"] = rng.randint(150, 220) * 1000
+    format_args["amount"] = rng.randint(100, 500)
+    format_args["volume"] = rng.randint(50, 200)
+    format_args["chance"] = rng.randint(10, 60)
 
-    output_content = tool_def["mock_output_template"].format(**format_args)
+    output_content = tool_def["mock_output_template"].format_map(format_args)
 
-    return ToolCallIO(
+    # Every field is generated here with the right type, so skip validation
+    return ToolCallIO.model_construct(
         function_tool=tool_name,
         input_params=input_params,
         output_content=[output_content],
         success=True,
-        latency_ms=random.randint(200, 1500),
+        latency_ms=rng.randint(200, 1500),
+        error=None,
     )
@@ -1,89 +1,104 @@
+import glob
 import json
 import os
 import sys
-from typing import Dict, Any, List
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from datetime import datetime
+from typing import Any, Callable, Dict, List
 
+from pydantic_core import from_json
 
-def create_markdown_table(data: Dict[str, Any], headers: List[str]) -> str:
-    """Creates a two-column markdown table from a dictionary."""
+
+# Built once; escapes pipes so cell values can't break the table
+_PIPE_ESCAPE = str.maketrans({"|": "\\|"})
+
+
+def create_markdown_table(
+    data: Dict[str, Any], headers: List[str], write: Callable[[str], None]
+) -> None:
+    """Writes a two-column markdown table built from a dictionary."""
     if not data:
-        return ""
+        return
 
     # Create the header and separator lines
-    header = f"| {headers[0]} | {headers[1]} |\n"
-    separator = "| :--- | :--- |\n"
+    write(f"| {headers[0]} | {headers[1]} |\n")
+    write("| :--- | :--- |\n")
 
     # Create the body of the table
-    body = ""
     for key, value in data.items():
         # Ensure values are strings and sanitize pipes to prevent breaking the table
-        sanitized_value = str(value).replace("|", "\\|") if value is not None else "N/A"
-        body += f"| **{key}** | {sanitized_value} |\n"
+        sanitized_value = (
+            str(value).translate(_PIPE_ESCAPE) if value is not None else "N/A"
+        )
+        write(f"| **{key}** | {sanitized_value} |\n")
+
 
-    return header + separator + body
+def format_timestamp(value: Any) -> Any:
+    """Renders UNIX-second timestamps as ISO 8601; older files already store ISO strings."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value).isoformat()
+    return value
 
 
-def format_tool_calls(tool_calls: List[Dict[str, Any]]) -> str:
-    """Formats the tool_calls list into a detailed Markdown section."""
+def format_tool_calls(
+    tool_calls: List[Dict[str, Any]], write: Callable[[str], None]
+) -> None:
+    """Writes the tool_calls list as a detailed Markdown section."""
     if not tool_calls:
-        return ""
+        return
 
-    parts = ["#### 🔧 Tool Calls"]
+    write("#### 🔧 Tool Calls\n")
     for i, call in enumerate(tool_calls):
         success_icon = "✅" if call.get("success") else "❌"
         latency = call.get("latency_ms", "N/A")
 
         # More compact and informative header for each tool call
-        parts.append(
-            f"**{i + 1}. Function:** `{call.get('function_tool', 'N/A')}` ({success_icon} | ⏱️ {latency} ms)"
+        write(
+            f"**{i + 1}. Function:** `{call.get('function_tool', 'N/A')}` ({success_icon} | ⏱️ {latency} ms)\n"
         )
 
         input_params = call.get("input_params", {})
         if input_params:
-            parts.append("**Input:**")
-            parts.append(f"```json\n{json.dumps(input_params, indent=2)}\n```")
+            write("**Input:**\n")
+            write(f"```json\n{json.dumps(input_params, indent=2)}\n```\n")
 
         output_content = call.get("output_content", [])
         if output_content:
-            parts.append("**Output:**")
+            write("**Output:**\n")
             output_str = "\n".join(map(str, output_content))
-            parts.append(f"```text\n{output_str}\n```")
+            write(f"```text\n{output_str}\n```\n")
 
         if "error" in call and call["error"]:
             error_msg = call["error"].get("message", "No error message.")
-            parts.append(f"**Error:** 🚨 `{error_msg}`")
+            write(f"**Error:** 🚨 `{error_msg}`\n")
 
-        parts.append("\n")
+        write("\n\n")
 
-    return "\n".join(parts)
 
-
-def format_turn(turn: Dict[str, Any]) -> str:
-    """Formats a single turn of a conversation."""
+def format_turn(turn: Dict[str, Any], write: Callable[[str], None]) -> None:
+    """Writes a single turn of a conversation."""
     turn_id = turn.get("turn_id", "N/A")
-    parts = []
 
     if "user_message" in turn and turn["user_message"]:
         msg = turn["user_message"]
-        parts.append(f"### 💬 Turn {turn_id}: User")
-        parts.append(f"> {msg.get('text', '')}\n")
+        write(f"### 💬 Turn {turn_id}: User\n")
+        write(f"> {msg.get('text', '')}\n\n")
 
         if "attachments" in msg and msg["attachments"]:
-            parts.append("**Attachments:**")
+            write("**Attachments:**\n")
             for att in msg["attachments"]:
-                parts.append(
-                    f"- [{att.get('attachment_type', 'file')}]({att.get('url')})"
-                )
+                write(f"- [{att.get('attachment_type', 'file')}]({att.get('url')})\n")
 
-        parts.append(f"Timestamp: `{msg.get('timestamp')}`")
+        write(f"Timestamp: `{format_timestamp(msg.get('timestamp'))}`\n")
 
     elif "assistant_response" in turn and turn["assistant_response"]:
         resp = turn["assistant_response"]
         success_icon = "✅" if resp.get("assistant_success") else "❌"
-        parts.append(f"### 🤖 Turn {turn_id}: Assistant {success_icon}")
-        parts.append(f"{resp.get('text', '')}\n")
+        write(f"### 🤖 Turn {turn_id}: Assistant {success_icon}\n")
+        write(f"{resp.get('text', '')}\n\n")
 
-        parts.append(format_tool_calls(resp.get("tool_calls", [])))
+        format_tool_calls(resp.get("tool_calls", []), write)
 
         # --- Performance & Stats Table ---
         stats_data = {}
@@ -108,24 +123,26 @@ def format_turn(turn: Dict[str, Any]) -> str:
             stats_data["Feedback"] = f"{feedback_icon}{comment}"
 
         if stats_data:
-            parts.append("#### Performance & Stats")
-            parts.append(
-                create_markdown_table(stats_data, headers=["Metric", "Details"])
-            )
+            write("#### Performance & Stats\n")
+            create_markdown_table(stats_data, ["Metric", "Details"], write)
+            write("\n")
 
         if "error" in resp and resp["error"]:
             error_msg = resp["error"].get("message", "No error message.")
-            parts.append(f"\n**Error:** 🚨 `{error_msg}`")
+            write(f"\n**Error:** 🚨 `{error_msg}`\n")
 
-    return "\n".join(parts) + "\n---"
+    write("---\n")
 
 
-def convert_json_to_markdown(conversation_data: Dict[str, Any]) -> str:
-    """Converts a conversation JSON object to a Markdown string."""
-    parts = [f"# 📊 Conversation Report: `{conversation_data.get('id')}`", "---"]
+def convert_json_to_markdown(
+    conversation_data: Dict[str, Any], write: Callable[[str], None]
+) -> None:
+    """Writes a conversation JSON object as Markdown, section by section."""
+    write(f"# 📊 Conversation Report: `{conversation_data.get('id')}`\n")
+    write("---\n")
 
     # --- Overview Section ---
-    parts.append("## ⚙️ Overview")
+    write("## ⚙️ Overview\n")
     summary = conversation_data.get("summary", {})
     user_meta = conversation_data.get("user_metadata", {})
 
@@ -141,35 +158,35 @@ def convert_json_to_markdown(conversation_data: Dict[str, Any]) -> str:
             else "None"
         ),
     }
-    parts.append(create_markdown_table(overview_data, headers=["Metric", "Value"]))
-    parts.append("---\n")
+    create_markdown_table(overview_data, ["Metric", "Value"], write)
+    write("\n---\n\n")
 
     # --- Turns Section ---
-    parts.append("## Conversation Turns")
+    write("## Conversation Turns\n")
     for turn in conversation_data.get("turns", []):
-        parts.append(format_turn(turn))
-
-    return "\n".join(parts)
+        format_turn(turn, write)
 
 
-def actions(script_name: str) -> None:
-    json_file_path = os.path.join(conversation_path, script_name)
+def convert_file(json_file_path: str, output_path: str) -> None:
+    """Converts one conversation file; a top-level function so worker processes can run it."""
+    script_name = os.path.basename(json_file_path)
     markdown_file_path = os.path.join(output_path, script_name[:-5] + ".md")
 
     try:
-        with open(json_file_path, "r") as f:
-            data = json.load(f)
+        # jiter parses the raw bytes in a single pass, without decoding to str first
+        with open(json_file_path, "rb") as f:
+            data = from_json(f.read())
 
-        markdown_output = convert_json_to_markdown(data)
-
-        with open(markdown_file_path, "w", encoding="utf-8") as f:
-            f.write(markdown_output)
+        # Sections go straight to the buffered file instead of being
+        # assembled into one string first
+        with open(markdown_file_path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            convert_json_to_markdown(data, f.write)
 
         print(f"✅ Successfully converted '{json_file_path}' to '{markdown_file_path}'")
 
     except FileNotFoundError:
         print(f"❌ Error: The file '{json_file_path}' was not found.")
-    except json.JSONDecodeError:
+    except ValueError:
         print(f"❌ Error: The file '{json_file_path}' contains invalid JSON.")
     except Exception as e:
         print(f"❌ An unexpected error occurred: {e}")
@@ -178,7 +195,7 @@ def actions(script_name: str) -> None:
 # Main execution block
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python converter.py <script_number>")
+        print("Usage: python converter.py <script_number> | --all")
         sys.exit(1)
 
     conversation_path = "conversations"
@@ -191,10 +208,13 @@ if __name__ == "__main__":
         os.makedirs(conversation_path)
 
     script_number = sys.argv[1]
-    if script_number == "-1":
-        all_files = os.listdir(conversation_path)
-        for file in all_files:
-            actions(file)
+    if script_number in ("--all", "-1"):
+        # Files are independent, so convert them on every core
+        all_files = glob.glob(os.path.join(conversation_path, "*.json"))
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            list(
+                executor.map(convert_file, all_files, repeat(output_path), chunksize=8)
+            )
     else:
         script_name = f"conversation_{script_number}.json"
-        actions(script_name)
+        convert_file(os.path.join(conversation_path, script_name), output_path)